@@ -4,6 +4,8 @@ import logging
 from pathlib import Path
 from typing import Dict
 
+from modules.json_io import read_json
+
 logger = logging.getLogger("ig_monitor_bot")
 
 
@@ -31,8 +33,7 @@ class Config:
             logger.warning("Please fill in your credentials and restart!")
             raise SystemExit("Configuration file created. Please fill it and restart.")
         
-        with open(self.config_path, 'r') as f:
-            return json.load(f)
+        return read_json(self.config_path)
     
     @property
     def api_id(self) -> int:
@@ -60,4 +61,23 @@ class Config:
     
     @property
     def generate_screenshots(self) -> bool:
-        return self.data.get('generate_screenshots', True)
\ No newline at end of file
+        return self.data.get('generate_screenshots', True)
+    
+    @property
+    def max_concurrent_checks(self) -> int:
+        return self.data.get('max_concurrent_checks', 8)
+    
+    # Every Instagram request of this client starts at least a random
+    # min_request_gap..max_request_gap seconds after the previous one, so the
+    # client makes at most ~2 / (min + max) requests per second however high
+    # max_concurrent_checks is. That caps how many accounts can be kept on
+    # schedule at about (min_check_interval + max_check_interval) / (min_request_gap
+    # + max_request_gap): ~450 with the defaults. Lower the gap (0 disables
+    # it) before raising max_concurrent_checks
+    @property
+    def min_request_gap(self) -> float:
+        return self.data.get('min_request_gap', 0.5)
+    
+    @property
+    def max_request_gap(self) -> float:
+        return self.data.get('max_request_gap', 1.5)
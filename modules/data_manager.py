@@ -1,18 +1,31 @@
 """Data manager module for monitored accounts"""
-import json
+import atexit
 import logging
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+from modules.json_io import atomic_write_json, read_json
 
 logger = logging.getLogger("ig_monitor_bot")
 
+# Minimum seconds between two writes of the database file
+FLUSH_INTERVAL = 1.0
+
 
 class DataManager:
     """Manages monitored accounts database"""
     def __init__(self, file_path: Path):
         self.file_path = file_path
         self.data = self._load_data()
+        self._dirty = False
+        self._last_flush = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()         # guards the flush bookkeeping; never held during I/O
+        self._write_lock = threading.Lock()   # keeps file writes in order
+        atexit.register(self.flush)
     
     def _load_data(self) -> Dict:
         """Load monitored accounts from file"""
@@ -20,36 +33,80 @@ class DataManager:
             return {}
         
         try:
-            with open(self.file_path, 'r') as f:
-                return json.load(f)
+            return read_json(self.file_path)
         except Exception as e:
             logger.error(f"Error loading data: {e}")
             return {}
     
-    def _save_data(self):
+    def _save_data(self, snapshot: Dict):
         """Save monitored accounts to file"""
         try:
-            with open(self.file_path, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            atomic_write_json(self.file_path, snapshot)
         except Exception as e:
             logger.error(f"Error saving data: {e}")
     
+    def _maybe_flush(self):
+        """Mark data dirty and schedule a write on a timer thread, at most
+        once per FLUSH_INTERVAL; the caller (the event loop) never touches disk"""
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is None:
+                wait = max(0.0, FLUSH_INTERVAL - (time.monotonic() - self._last_flush))
+                self._flush_timer = threading.Timer(wait, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def flush(self):
+        """Write pending changes to disk now"""
+        # The write lock is taken first so a newer snapshot can never be
+        # overwritten by an older one still being written
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                self._last_flush = time.monotonic()
+                # Snapshot under the lock: the event loop keeps mutating
+                # self.data while the file is written
+                snapshot = dict(self.data)
+            self._save_data(snapshot)
+    
     def add_account(self, username: str, chat_id: int):
         """Add account to monitoring"""
         self.data[username.lower()] = {
             "username": username,
             "chat_id": chat_id,
-            "added_at": datetime.now().isoformat()
+            "added_at": datetime.now().isoformat(),
+            "added_at_ts": int(time.time())
         }
-        self._save_data()
+        self._maybe_flush()
         logger.info(f"Added @{username} to database")
     
+    def add_accounts(self, pairs: List[Tuple[str, int]]):
+        """Add several accounts to monitoring with a single save"""
+        if not pairs:
+            return
+        now = datetime.now().isoformat()
+        now_ts = int(time.time())
+        for username, chat_id in pairs:
+            self.data[username.lower()] = {
+                "username": username,
+                "chat_id": chat_id,
+                "added_at": now,
+                "added_at_ts": now_ts
+            }
+        self._maybe_flush()
+        logger.info(f"Added {len(pairs)} account(s) to database")
+    
     def remove_account(self, username: str) -> bool:
         """Remove account from monitoring"""
         username = username.lower()
         if username in self.data:
             del self.data[username]
-            self._save_data()
+            self._maybe_flush()
             logger.info(f"Removed @{username} from database")
             return True
         return False
@@ -70,5 +127,5 @@ class DataManager:
         """Clear all monitored accounts"""
         count = len(self.data)
         self.data = {}
-        self._save_data()
+        self._maybe_flush()
         logger.info(f"Cleared all {count} accounts from database")
\ No newline at end of file
@@ -4,9 +4,16 @@ import asyncio
 import random
 import logging
 import hashlib
+import time
 import uuid
+from email.utils import parsedate_to_datetime
+from io import BytesIO
 from typing import Optional, Tuple, Dict
 
+from aiohttp.resolver import AsyncResolver
+
+from modules.json_io import loads as json_loads
+
 logger = logging.getLogger("ig_monitor_bot")
 
 # Latest Instagram Android user agents (Jan 2025)
@@ -18,24 +25,83 @@ USER_AGENTS = [
     "Instagram 311.0.0.41.109 Android (30/11; 480dpi; 1080x2400; OPPO; CPH2207; OP4F2F; qcom; en_US; 554147875)",
 ]
 
+# Default (min, max) seconds between the starts of two Instagram requests,
+# process-wide; see Config.min_request_gap
+REQUEST_GAP = (0.5, 1.5)
+
+# Header template in the order the app sends them; empty values are filled
+# in per request by _generate_headers
+_BASE_HEADERS = {
+    "User-Agent": "",
+    "X-IG-App-ID": "936619743392459",
+    "X-IG-Device-ID": "",
+    "X-IG-Android-ID": "",
+    "X-IG-App-Locale": "en_US",
+    "X-IG-Device-Locale": "en_US",
+    "X-IG-Mapped-Locale": "en_US",
+    "X-IG-Connection-Type": "WIFI",
+    "X-IG-Capabilities": "3brTv10=",
+    "X-IG-App-Startup-Country": "US",
+    "X-Bloks-Version-Id": "",
+    "X-IG-WWW-Claim": "0",
+    "X-Bloks-Is-Layout-RTL": "false",
+    "X-IG-Connection-Speed": "",
+    "X-IG-Bandwidth-Speed-KBPS": "",
+    "X-IG-Bandwidth-TotalBytes-B": "",
+    "X-IG-Bandwidth-TotalTime-MS": "",
+    "X-IG-EU-DC-ENABLED": "true",
+    "X-IG-Extended-CDN-Thumbnail-Cache-Busting-Value": "",
+    "X-Mid": "",
+    "Accept-Language": "en-US",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept": "*/*",
+    "Connection": "keep-alive",
+    "Cookie": "",
+}
+
 class InstagramAPI:
-    def __init__(self, session_manager, proxy_url: Optional[str] = None):
+    def __init__(
+        self,
+        session_manager,
+        proxy_url: Optional[str] = None,
+        request_gap: Tuple[float, float] = REQUEST_GAP,
+    ):
         self.session_manager = session_manager
         self.proxy_url = proxy_url
+        self.request_gap = request_gap
         self.session: Optional[aiohttp.ClientSession] = None
+        self._next_request_at = 0.0   # monotonic time the next request may start
     
     async def get_session(self):
         """Get or create HTTP session"""
         if self.session is None or self.session.closed:
+            # One long-lived session for every request: keep-alive connections
+            # and cached DNS answers skip the TCP/TLS + lookup cost per poll
+            # limit_per_host sits above max_concurrent_checks, which
+            # TelegramMonitorService enforces, so checks never queue here
             connector = aiohttp.TCPConnector(
-                limit=10, 
-                limit_per_host=2,
+                resolver=self._make_resolver(),
+                limit=64,
+                limit_per_host=16,
+                keepalive_timeout=75,
+                use_dns_cache=True,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
                 ssl=False  # Disable SSL verification for proxy compatibility
             )
             timeout = aiohttp.ClientTimeout(total=30, connect=10)
             self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
         return self.session
     
+    @staticmethod
+    def _make_resolver():
+        """Non-blocking aiodns resolver when aiodns is installed, else aiohttp's
+        default (getaddrinfo on an executor thread)"""
+        try:
+            return AsyncResolver()
+        except RuntimeError:
+            return None
+    
     async def close(self):
         """Close HTTP session"""
         if self.session and not self.session.closed:
@@ -48,151 +114,173 @@ class InstagramAPI:
     
     def _generate_headers(self, username: str, sessionid: str) -> Dict[str, str]:
         """Generate realistic Instagram mobile app headers with session cookie"""
-        user_agent = random.choice(USER_AGENTS)
         device_id = self._generate_device_id()
+        # 20 hex chars, enough for both IDs below. Hashed rather than sliced
+        # from the uuid, whose fixed version nibble would show in the IDs
+        device_hash = hashlib.blake2b(device_id.encode(), digest_size=10).hexdigest()
         
-        headers = {
-            "User-Agent": user_agent,
-            "X-IG-App-ID": "936619743392459",
-            "X-IG-Device-ID": device_id,
-            "X-IG-Android-ID": f"android-{hashlib.md5(device_id.encode()).hexdigest()[:16]}",
-            "X-IG-App-Locale": "en_US",
-            "X-IG-Device-Locale": "en_US",
-            "X-IG-Mapped-Locale": "en_US",
-            "X-IG-Connection-Type": "WIFI",
-            "X-IG-Capabilities": "3brTv10=",
-            "X-IG-App-Startup-Country": "US",
-            "X-Bloks-Version-Id": hashlib.md5(str(int(asyncio.get_event_loop().time())).encode()).hexdigest()[:16],
-            "X-IG-WWW-Claim": "0",
-            "X-Bloks-Is-Layout-RTL": "false",
-            "X-IG-Connection-Speed": f"{random.randint(1000, 3000)}kbps",
-            "X-IG-Bandwidth-Speed-KBPS": str(random.uniform(2000.0, 5000.0)),
-            "X-IG-Bandwidth-TotalBytes-B": str(random.randint(5000000, 10000000)),
-            "X-IG-Bandwidth-TotalTime-MS": str(random.randint(200, 500)),
-            "X-IG-EU-DC-ENABLED": "true",
-            "X-IG-Extended-CDN-Thumbnail-Cache-Busting-Value": str(random.randint(1000, 9999)),
-            "X-Mid": hashlib.md5(device_id.encode()).hexdigest()[:20],
-            "Accept-Language": "en-US",
-            "Accept-Encoding": "gzip, deflate",
-            "Accept": "*/*",
-            "Connection": "keep-alive",
-            "Cookie": f"sessionid={sessionid}"
-        }
+        # Only the per-request fields change; assigning keeps _BASE_HEADERS' order
+        headers = _BASE_HEADERS.copy()
+        headers["User-Agent"] = self.session_manager.get_ua_for_current(USER_AGENTS)
+        headers["X-IG-Device-ID"] = device_id
+        headers["X-IG-Android-ID"] = f"android-{device_hash[:16]}"
+        headers["X-Bloks-Version-Id"] = hashlib.blake2b(str(int(time.time())).encode(), digest_size=8).hexdigest()
+        headers["X-IG-Connection-Speed"] = f"{random.randint(1000, 3000)}kbps"
+        headers["X-IG-Bandwidth-Speed-KBPS"] = str(random.uniform(2000.0, 5000.0))
+        headers["X-IG-Bandwidth-TotalBytes-B"] = str(random.randint(5000000, 10000000))
+        headers["X-IG-Bandwidth-TotalTime-MS"] = str(random.randint(200, 500))
+        headers["X-IG-Extended-CDN-Thumbnail-Cache-Busting-Value"] = str(random.randint(1000, 9999))
+        headers["X-Mid"] = device_hash[:20]
+        headers["Cookie"] = f"sessionid={sessionid}"
         
         return headers
     
-    async def fetch_profile(self, username: str, retry_count: int = 0, max_retries: int = 3) -> Tuple[Optional[int], Optional[Dict]]:
+    @staticmethod
+    def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+        """Server-requested wait (Retry-After, seconds or HTTP date) with jitter, if any"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        # Same 5 min ceiling as the backoff: the retry holds a check slot meanwhile
+        return min(300, max(seconds, random.uniform(5, 15)))
+    
+    async def fetch_profile(self, username: str, max_retries: int = 3) -> Tuple[Optional[int], Optional[Dict]]:
         """Fetch Instagram profile with session rotation on errors"""
         
-        logger.debug(f"[@{username}] fetch_profile called (retry: {retry_count})")
+        logger.debug(f"[@{username}] fetch_profile called")
         
-        # Exponential backoff delay
-        if retry_count > 0:
-            delay = min(300, (2 ** retry_count) * 30 + random.uniform(10, 30))
-            logger.info(f"[@{username}] Retry {retry_count}/{max_retries} after {delay:.1f}s")
-            await asyncio.sleep(delay)
-        
-        # Random delay before request (anti-pattern detection)
-        delay = random.uniform(2, 5)
-        logger.debug(f"[@{username}] Waiting {delay:.1f}s before request...")
-        await asyncio.sleep(delay)
+        if not self.proxy_url:
+            logger.error("No proxy configured! Please add proxy to config.json")
+            return None, None
         
-        # Get current session
-        current_sessionid = self.session_manager.get_current_session()
-        headers = self._generate_headers(username, current_sessionid)
         url = f"https://i.instagram.com/api/v1/users/web_profile_info/?username={username}"
-        
         logger.debug(f"[@{username}] URL: {url}")
         logger.debug(f"[@{username}] Using proxy: {self.proxy_url}")
         
-        if not self.proxy_url:
-            logger.error("No proxy configured! Please add proxy to config.json")
-            return None, None
+        result = (None, None)
+        retry_delay = None   # server-requested wait before the next attempt
         
-        session = await self.get_session()
-        logger.debug(f"[@{username}] HTTP session obtained, making request...")
-        
-        try:
-            logger.debug(f"[@{username}] Starting HTTP GET request...")
-            async with session.get(url, headers=headers, proxy=self.proxy_url) as response:
-                status = response.status
-                
-                logger.info(f"[@{username}] 📡 Instagram API Response: HTTP {status}")
-                
-                if status == 200:
-                    try:
-                        data = await response.json()
-                        
-                        # Check if user data exists
-                        has_user = data.get('data', {}).get('user')
-                        
-                        if has_user:
-                            response_username = data['data']['user'].get('username', '').lower()
-                            requested_username = username.lower()
+        for attempt in range(max_retries + 1):
+            # Exponential backoff delay (outside any open response, so the
+            # connection is back in the pool while we wait)
+            if attempt > 0:
+                if retry_delay is not None:
+                    delay = retry_delay
+                else:
+                    delay = min(300, (2 ** attempt) * 30 + random.uniform(10, 30))
+                retry_delay = None
+                logger.info(f"[@{username}] Retry {attempt}/{max_retries} after {delay:.1f}s")
+                await asyncio.sleep(delay)
+            
+            # Keep a randomized minimum gap between any two requests
+            # (anti-pattern detection) rather than delaying every request
+            now = time.monotonic()
+            start = max(now, self._next_request_at)
+            self._next_request_at = start + random.uniform(*self.request_gap)
+            if start > now:
+                logger.debug(f"[@{username}] Waiting {start - now:.1f}s before request...")
+                await asyncio.sleep(start - now)
+            
+            # Get current session
+            current_sessionid = self.session_manager.get_current_session()
+            headers = self._generate_headers(username, current_sessionid)
+            
+            session = await self.get_session()
+            logger.debug(f"[@{username}] HTTP session obtained, making request...")
+            
+            auth_error = False
+            try:
+                logger.debug(f"[@{username}] Starting HTTP GET request...")
+                async with session.get(url, headers=headers, proxy=self.proxy_url) as response:
+                    status = response.status
+                    
+                    logger.info(f"[@{username}] 📡 Instagram API Response: HTTP {status}")
+                    
+                    if status == 200:
+                        try:
+                            data = await response.json(loads=json_loads)
+                            
+                            # Check if user data exists
+                            has_user = data.get('data', {}).get('user')
                             
-                            if response_username == requested_username:
-                                logger.info(f"[@{username}] ✅ Account is ACTIVE (profile fetched successfully)")
-                                return status, data
+                            if has_user:
+                                response_username = data['data']['user'].get('username', '').lower()
+                                requested_username = username.lower()
+                                
+                                if response_username == requested_username:
+                                    logger.info(f"[@{username}] ✅ Account is ACTIVE (profile fetched successfully)")
+                                    return status, data
+                                else:
+                                    logger.warning(f"[@{username}] Username mismatch - possibly banned/redirected")
+                                    return status, None
                             else:
-                                logger.warning(f"[@{username}] Username mismatch - possibly banned/redirected")
+                                logger.info(f"[@{username}] ⏳ Account suspended/banned (no user data in response)")
                                 return status, None
-                        else:
-                            logger.info(f"[@{username}] ⏳ Account suspended/banned (no user data in response)")
+                                
+                        except Exception as e:
+                            logger.error(f"[@{username}] JSON decode error: {type(e).__name__}: {e}")
                             return status, None
                             
-                    except Exception as e:
-                        logger.error(f"[@{username}] JSON decode error: {type(e).__name__}: {e}")
+                    elif status == 404:
+                        logger.info(f"[@{username}] ⏳ Account not found/suspended (404)")
                         return status, None
                         
-                elif status == 404:
-                    logger.info(f"[@{username}] ⏳ Account not found/suspended (404)")
-                    return status, None
-                    
-                elif status == 429:
-                    logger.warning(f"[@{username}] ⚠️ Rate limited (429) - rotating session")
-                    self.session_manager.rotate_session()
-                    if retry_count < max_retries:
-                        return await self.fetch_profile(username, retry_count + 1, max_retries)
-                    return status, None
-                    
-                elif status in [400, 401]:
-                    logger.warning(f"[@{username}] ⚠️ Auth error ({status}) - rotating session")
-                    self.session_manager.rotate_session()
-                    if retry_count < max_retries:
-                        await asyncio.sleep(random.uniform(1, 5))
-                        return await self.fetch_profile(username, retry_count + 1, max_retries)
-                    return status, None
-                    
-                else:
-                    logger.warning(f"[@{username}] Unexpected status {status}")
-                    if retry_count < max_retries:
-                        return await self.fetch_profile(username, retry_count + 1, max_retries)
-                    return status, None
+                    elif status == 429:
+                        logger.warning(f"[@{username}] ⚠️ Rate limited (429) - rotating session")
+                        self.session_manager.rotate_session()
+                        retry_delay = self._retry_after(response)
+                        
+                    elif status in [400, 401]:
+                        logger.warning(f"[@{username}] ⚠️ Auth error ({status}) - rotating session")
+                        self.session_manager.rotate_session()
+                        retry_delay = self._retry_after(response)
+                        auth_error = True
+                        
+                    else:
+                        logger.warning(f"[@{username}] Unexpected status {status}")
                     
-        except asyncio.TimeoutError:
-            logger.error(f"[@{username}] ⏱️ Request timeout (30s)")
-            if retry_count < max_retries:
-                return await self.fetch_profile(username, retry_count + 1, max_retries)
-            return None, None
-        except aiohttp.ClientProxyConnectionError as e:
-            logger.error(f"[@{username}] 🔌 Proxy connection error: {e}")
-            if retry_count < max_retries:
-                return await self.fetch_profile(username, retry_count + 1, max_retries)
-            return None, None
-        except aiohttp.ClientError as e:
-            logger.error(f"[@{username}] 🌐 HTTP Client error: {type(e).__name__}: {e}")
-            if retry_count < max_retries:
-                return await self.fetch_profile(username, retry_count + 1, max_retries)
-            return None, None
-        except Exception as e:
-            logger.error(f"[@{username}] ❌ Unexpected error: {type(e).__name__}: {e}")
-            import traceback
-            logger.error(f"[@{username}] Traceback: {traceback.format_exc()}")
-            if retry_count < max_retries:
-                return await self.fetch_profile(username, retry_count + 1, max_retries)
-            return None, None
+                    result = (status, None)
+                        
+            except asyncio.TimeoutError:
+                logger.error(f"[@{username}] ⏱️ Request timeout (30s)")
+                result = (None, None)
+            except aiohttp.ClientProxyConnectionError as e:
+                logger.error(f"[@{username}] 🔌 Proxy connection error: {e}")
+                result = (None, None)
+            except aiohttp.ClientError as e:
+                logger.error(f"[@{username}] 🌐 HTTP Client error: {type(e).__name__}: {e}")
+                result = (None, None)
+            except Exception as e:
+                logger.error(f"[@{username}] ❌ Unexpected error: {type(e).__name__}: {e}")
+                import traceback
+                logger.error(f"[@{username}] Traceback: {traceback.format_exc()}")
+                result = (None, None)
+            
+            if auth_error and attempt < max_retries:
+                await asyncio.sleep(random.uniform(1, 5))
+        
+        return result
+    
+    @staticmethod
+    async def _read_into_buffer(response: aiohttp.ClientResponse) -> Optional[BytesIO]:
+        """Stream a response body into a rewound BytesIO, None if the body is empty
+        (a BytesIO is truthy even when empty, so callers can't test it directly)"""
+        buf = BytesIO()
+        async for chunk in response.content.iter_chunked(65536):
+            buf.write(chunk)
+        if not buf.tell():
+            return None
+        buf.seek(0)
+        return buf
     
-    async def download_profile_picture(self, profile_pic_url: str, username: str = "unknown") -> Optional[bytes]:
+    async def download_profile_picture(self, profile_pic_url: str, username: str = "unknown") -> Optional[BytesIO]:
         """Download profile picture from URL - with retry logic"""
         max_retries = 2
         
@@ -205,9 +293,11 @@ class InstagramAPI:
                 
                 async with session.get(profile_pic_url) as response:
                     if response.status == 200:
-                        image_data = await response.read()
-                        logger.info(f"[@{username}] ✅ Profile picture downloaded ({len(image_data)} bytes)")
-                        return image_data
+                        image_data = await self._read_into_buffer(response)
+                        if image_data is not None:
+                            logger.info(f"[@{username}] ✅ Profile picture downloaded ({image_data.getbuffer().nbytes} bytes)")
+                            return image_data
+                        logger.warning(f"[@{username}] Profile picture download returned an empty body")
                     else:
                         logger.warning(f"[@{username}] Profile picture download failed: HTTP {response.status}")
                         
@@ -218,9 +308,11 @@ class InstagramAPI:
                             
                             async with session.get(profile_pic_url, proxy=self.proxy_url) as proxy_response:
                                 if proxy_response.status == 200:
-                                    image_data = await proxy_response.read()
-                                    logger.info(f"[@{username}] ✅ Profile picture downloaded via proxy ({len(image_data)} bytes)")
-                                    return image_data
+                                    image_data = await self._read_into_buffer(proxy_response)
+                                    if image_data is not None:
+                                        logger.info(f"[@{username}] ✅ Profile picture downloaded via proxy ({image_data.getbuffer().nbytes} bytes)")
+                                        return image_data
+                                    logger.warning(f"[@{username}] Proxy download returned an empty body")
                                 else:
                                     logger.warning(f"[@{username}] Proxy download also failed: HTTP {proxy_response.status}")
                         
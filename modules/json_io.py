@@ -0,0 +1,57 @@
+"""JSON file helpers shared by the bots"""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any
+
+# orjson is an optional, much faster drop-in for (de)serialising
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fastest available str/bytes -> object parser
+loads = orjson.loads if orjson is not None else json.loads
+
+# Process umask, read once at import (os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def read_json(path: Path) -> Any:
+    """Parse a JSON file"""
+    return loads(Path(path).read_bytes())
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Replace path's contents via a temp file + os.replace, so a crash
+    mid-write never leaves a truncated file behind. The temp file is private
+    (mkstemp creates it 0600) until it takes the target's mode, or the mode
+    open() would have given a new file, right before the swap"""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        else:
+            os.chmod(tmp_name, 0o666 & ~_UMASK)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: Path, obj: Any):
+    """Write obj as indented JSON, atomically (see atomic_write_bytes)"""
+    if orjson is not None:
+        raw = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        raw = json.dumps(obj, indent=2).encode()
+    atomic_write_bytes(path, raw)
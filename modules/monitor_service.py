@@ -3,18 +3,45 @@ Account monitoring service module for Telegram
 """
 
 import asyncio
+import heapq
+import itertools
 import logging
 import time
 import random
 import json
+from functools import lru_cache
+from hashlib import blake2b
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from io import BytesIO
 
 from telethon import Button
 
 logger = logging.getLogger("ig_monitor_bot")
 
+# Uploaded screenshots remembered for resending without a re-upload
+MEDIA_CACHE_SIZE = 64
+
+# A check starting this many seconds late means the request rate (see
+# Config.min_request_gap) can't keep up with the monitored accounts;
+# warned about at most once per LAG_WARNING_INTERVAL
+LAG_WARNING_THRESHOLD = 60
+LAG_WARNING_INTERVAL = 600
+
+
+@lru_cache(maxsize=256)
+def _format_elapsed(seconds: int) -> str:
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    secs = seconds % 60
+
+    if hours > 0:
+        return f"{hours}h {minutes}m {secs}s"
+    elif minutes > 0:
+        return f"{minutes}m {secs}s"
+    else:
+        return f"{secs}s"
+
 
 class TelegramMonitorService:
     """Monitor service for Telegram"""
@@ -33,14 +60,29 @@ class TelegramMonitorService:
         self.screenshot_gen = screenshot_gen
         self.telegram_client = telegram_client
         self.config = config
-        self.active_monitors = {}
-
-        # Load verification badge
-        self.verification_badge = None
+        # { username: {"chat_id", "start_time", "checks"} } — the entry object
+        # doubles as the schedule generation: heap items whose entry is no
+        # longer the active one are stale and get dropped when popped
+        self.active_monitors: Dict[str, dict] = {}
+
+        # Checks are scheduled on one heap of (due, seq, username, entry) and
+        # run by a fixed pool of workers, so at most max_concurrent_checks
+        # requests are in flight however many accounts are monitored.
+        # _heap_changed wakes idle workers when an earlier check is pushed
+        self._due_heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._heap_changed = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._last_lag_warning = float("-inf")
+
+        # { blake2b of screenshot bytes: Photo Telegram returned for it }
+        self._media_cache: Dict[str, object] = {}
+
+        # Load verification badge (the generator keeps it decoded and resized)
         try:
             if bluetick_path.exists():
                 with open(bluetick_path, "rb") as f:
-                    self.verification_badge = f.read()
+                    self.screenshot_gen.set_verification_badge(f.read())
                 logger.info("Verification badge loaded successfully")
             else:
                 logger.warning(f"bluetick.png not found at {bluetick_path}")
@@ -61,69 +103,126 @@ class TelegramMonitorService:
 
     def format_elapsed_time(self, seconds: float) -> str:
         """Format elapsed time in human-readable format"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-
-        if hours > 0:
-            return f"{hours}h {minutes}m {secs}s"
-        elif minutes > 0:
-            return f"{minutes}m {secs}s"
-        else:
-            return f"{secs}s"
+        return _format_elapsed(int(seconds))
 
     # -----------------------------------------------------
-    # Monitoring loop
+    # Scheduler
     # -----------------------------------------------------
 
-    async def monitor_account(self, username: str, chat_id: int):
-        start_time = time.time()
-        check_count = 0
+    def _schedule(self, username: str, entry: dict, delay: float = 0.0):
+        """Queue the next check for a monitor"""
+        heapq.heappush(
+            self._due_heap,
+            (time.monotonic() + delay, next(self._seq), username, entry),
+        )
+        self._heap_changed.set()
+        self._ensure_workers()
+
+    def _ensure_workers(self):
+        """Start the worker pool on first use"""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.config.max_concurrent_checks)
+        ]
+
+    async def _next_due(self) -> Tuple[str, dict]:
+        """Wait for the earliest live check to come due and claim it"""
+        heap = self._due_heap
+        while True:
+            self._heap_changed.clear()
+            # Drop stopped / replaced monitors
+            while heap and self.active_monitors.get(heap[0][2]) is not heap[0][3]:
+                heapq.heappop(heap)
+            wait = heap[0][0] - time.monotonic() if heap else None
+            if wait is not None and wait <= 0:
+                _, _, username, entry = heapq.heappop(heap)
+                if heap:
+                    self._heap_changed.set()   # let an idle worker look at the next one
+                if -wait > LAG_WARNING_THRESHOLD:
+                    self._warn_lag(-wait)
+                return username, entry
+            try:
+                await asyncio.wait_for(self._heap_changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _warn_lag(self, lag: float):
+        now = time.monotonic()
+        if now - self._last_lag_warning < LAG_WARNING_INTERVAL:
+            return
+        self._last_lag_warning = now
+        logger.warning(
+            "Checks are running %ds behind schedule for %d account(s): lower "
+            "min_request_gap/max_request_gap or raise the check intervals",
+            lag, len(self.active_monitors),
+        )
 
-        logger.info(f"[@{username}] 🚀 Started monitoring for chat {chat_id}")
+    async def _worker(self):
+        while True:
+            username, entry = await self._next_due()
+            try:
+                await self.check_account(username, entry)
+            except Exception as e:
+                logger.error("[@%s] Check failed: %s: %s", username, type(e).__name__, e)
 
-        while self.data_manager.is_monitoring(username):
-            check_count += 1
-            check_interval = random.randint(
-                self.config.min_check_interval,
-                self.config.max_check_interval,
-            )
+    # -----------------------------------------------------
+    # Monitoring check
+    # -----------------------------------------------------
 
-            logger.info(f"[@{username}] 🔍 Check #{check_count} - Fetching profile...")
+    async def check_account(self, username: str, entry: dict):
+        """Run one check for a monitor and schedule the next"""
+        if not self.data_manager.is_monitoring(username):
+            self.active_monitors.pop(username, None)
+            logger.info("[@%s] ⏹️ Monitoring stopped", username)
+            return
+
+        entry["checks"] += 1
+        check_interval = random.randint(
+            self.config.min_check_interval,
+            self.config.max_check_interval,
+        )
 
-            try:
-                status_code, data = await self.instagram_api.fetch_profile(username)
-            except asyncio.TimeoutError:
-                logger.error(f"[@{username}] ⏱️ Request timeout")
-                logger.info(f"[@{username}] Retry after {check_interval}s")
-                await asyncio.sleep(check_interval)
-                continue
-            except Exception as e:
-                logger.error(
-                    f"[@{username}] Fetch exception: {e}", exc_info=True
-                )
-                await asyncio.sleep(check_interval)
-                continue
-
-            # ✅ RECOVERY CHECK
-            if (
-                data
-                and isinstance(data, dict)
-                and data.get("data", {}).get("user")
-            ):
-                logger.info(f"[@{username}] 🎉 ACCOUNT RECOVERED")
-                await self._handle_account_recovery(
-                    username,
-                    data,
-                    chat_id,
-                    start_time,
-                )
-                return
+        logger.info("[@%s] 🔍 Check #%d - Fetching profile...", username, entry["checks"])
 
-            logger.info(f"[@{username}] ⏰ Next check in {check_interval}s")
-            await asyncio.sleep(check_interval)
+        try:
+            status_code, data = await self.instagram_api.fetch_profile(username)
+        except asyncio.TimeoutError:
+            logger.error("[@%s] ⏱️ Request timeout", username)
+            logger.info("[@%s] Retry after %ds", username, check_interval)
+            self._reschedule(username, entry, check_interval)
+            return
+        except Exception as e:
+            logger.error("[@%s] Fetch exception: %s: %s", username, type(e).__name__, e)
+            self._reschedule(username, entry, check_interval)
+            return
+
+        # Stopped while the request was in flight
+        if self.active_monitors.get(username) is not entry:
+            return
+
+        # ✅ RECOVERY CHECK
+        if (
+            data
+            and isinstance(data, dict)
+            and data.get("data", {}).get("user")
+        ):
+            logger.info("[@%s] 🎉 ACCOUNT RECOVERED", username)
+            await self._handle_account_recovery(
+                username,
+                data,
+                entry["chat_id"],
+                entry["start_time"],
+            )
+            return
 
-        logger.info(f"[@{username}] ⏹️ Monitoring stopped")
+        logger.info("[@%s] ⏰ Next check in %ds", username, check_interval)
+        self._reschedule(username, entry, check_interval)
+
+    def _reschedule(self, username: str, entry: dict, delay: float):
+        if self.active_monitors.get(username) is entry:
+            self._schedule(username, entry, delay)
 
     # -----------------------------------------------------
     # Recovery handler
@@ -137,7 +236,7 @@ class TelegramMonitorService:
         start_time: float,
     ):
         """Handle account recovery notification"""
-        logger.info(f"[@{username}] Processing account recovery notification...")
+        logger.info("[@%s] Processing account recovery notification...", username)
         
         user = data["data"]["user"]
 
@@ -166,10 +265,10 @@ class TelegramMonitorService:
         button = Button.url("View Profile", instagram_url)
 
         try:
-            logger.info(f"[@{username}] Attempting to send notification...")
+            logger.info("[@%s] Attempting to send notification...", username)
             
             if self.config.generate_screenshots and profile_pic_url:
-                logger.info(f"[@{username}] Generating screenshot with profile picture...")
+                logger.info("[@%s] Generating screenshot with profile picture...", username)
                 await self._send_with_screenshot(
                     chat_id,
                     username,
@@ -184,33 +283,33 @@ class TelegramMonitorService:
                     button,
                 )
             else:
-                logger.info(f"[@{username}] Sending text-only notification...")
+                logger.info("[@%s] Sending text-only notification...", username)
                 await self.telegram_client.send_message(
                     chat_id,
                     message_text,
                     buttons=[button],
                     parse_mode="md",
                 )
-                logger.info(f"[@{username}] ✅ Text notification sent successfully")
+                logger.info("[@%s] ✅ Text notification sent successfully", username)
                 
         except Exception as e:
-            logger.error(f"[@{username}] ❌ Notify error: {e}", exc_info=True)
-            logger.info(f"[@{username}] Attempting fallback text message...")
+            logger.error("[@%s] ❌ Notify error: %s: %s", username, type(e).__name__, e)
+            logger.info("[@%s] Attempting fallback text message...", username)
             try:
                 await self.telegram_client.send_message(
                     chat_id,
                     message_text,
                     parse_mode="md",
                 )
-                logger.info(f"[@{username}] ✅ Fallback message sent")
+                logger.info("[@%s] ✅ Fallback message sent", username)
             except Exception as fallback_error:
-                logger.error(f"[@{username}] ❌ Fallback also failed: {fallback_error}", exc_info=True)
+                logger.error("[@%s] ❌ Fallback also failed: %s", username, fallback_error, exc_info=True)
 
         # 🔥 CRITICAL FIX: Remove account AFTER sending notification
-        logger.info(f"[@{username}] Removing from monitoring list...")
+        logger.info("[@%s] Removing from monitoring list...", username)
         self.data_manager.remove_account(username)
         self.active_monitors.pop(username, None)
-        logger.info(f"[@{username}] ✅ Removed from monitoring list")
+        logger.info("[@%s] ✅ Removed from monitoring list", username)
 
     # -----------------------------------------------------
     # Screenshot sender (IMAGE FIX)
@@ -232,14 +331,14 @@ class TelegramMonitorService:
     ):
         """Send notification with screenshot"""
         try:
-            logger.info(f"[@{username}] Downloading profile picture...")
+            logger.info("[@%s] Downloading profile picture...", username)
             image_data = await self.instagram_api.download_profile_picture(
                 profile_pic_url,
                 username
             )
 
-            if not image_data:
-                logger.warning(f"[@{username}] Failed to download profile picture, sending text only")
+            if image_data is None:
+                logger.warning("[@%s] Failed to download profile picture, sending text only", username)
                 await self.telegram_client.send_message(
                     chat_id,
                     message_text,
@@ -248,7 +347,7 @@ class TelegramMonitorService:
                 )
                 return
 
-            logger.info(f"[@{username}] Generating screenshot...")
+            logger.info("[@%s] Generating screenshot...", username)
             # 🔥 FIX: Properly await the screenshot generation
             screenshot = await asyncio.to_thread(
                 self.screenshot_gen.create_screenshot,
@@ -260,11 +359,10 @@ class TelegramMonitorService:
                 full_name,
                 bio,
                 is_verified,
-                self.verification_badge,
             )
 
             if not screenshot:
-                logger.warning(f"[@{username}] Screenshot generator returned empty result, sending text only")
+                logger.warning("[@%s] Screenshot generator returned empty result, sending text only", username)
                 await self.telegram_client.send_message(
                     chat_id,
                     message_text,
@@ -282,7 +380,7 @@ class TelegramMonitorService:
             elif isinstance(screenshot, (bytes, bytearray)):
                 photo = BytesIO(screenshot)
             else:
-                logger.error(f"[@{username}] Invalid screenshot type: {type(screenshot)}")
+                logger.error("[@%s] Invalid screenshot type: %s", username, type(screenshot))
                 raise TypeError(f"Invalid screenshot type: {type(screenshot)}")
 
             # 🔥 CRITICAL: filename tells Telegram it's an IMAGE
@@ -290,25 +388,42 @@ class TelegramMonitorService:
             photo.seek(0)
 
             logger.info(
-                f"[@{username}] Sending screenshot as IMAGE ({photo.getbuffer().nbytes} bytes)"
+                "[@%s] Sending screenshot as IMAGE (%d bytes)", username, photo.getbuffer().nbytes
             )
 
-            await self.telegram_client.send_file(
-                chat_id,
-                file=photo,
+            send_kwargs = dict(
                 caption=message_text,
                 buttons=[button],
                 parse_mode="md",
                 force_document=False,
             )
 
-            logger.info(f"[@{username}] ✅ Screenshot sent successfully")
+            # Identical bytes were uploaded before: send the stored Photo,
+            # which needs no upload
+            digest = blake2b(photo.getbuffer(), digest_size=16).hexdigest()
+            media = self._media_cache.get(digest)
+            if media is not None:
+                try:
+                    await self.telegram_client.send_file(chat_id, file=media, **send_kwargs)
+                except Exception as e:
+                    # Most likely an expired file reference: upload again
+                    logger.warning("[@%s] Cached screenshot resend failed: %s: %s", username, type(e).__name__, e)
+                    self._media_cache.pop(digest, None)
+                    media = None
+
+            if media is None:
+                msg = await self.telegram_client.send_file(chat_id, file=photo, **send_kwargs)
+                if getattr(msg, "photo", None) is not None:
+                    self._media_cache[digest] = msg.photo
+                    if len(self._media_cache) > MEDIA_CACHE_SIZE:
+                        # dicts keep insertion order: drop the oldest upload
+                        del self._media_cache[next(iter(self._media_cache))]
+
+            logger.info("[@%s] ✅ Screenshot sent successfully", username)
 
         except Exception as e:
-            logger.error(
-                f"[@{username}] ❌ Screenshot send failed: {e}", exc_info=True
-            )
-            logger.info(f"[@{username}] Falling back to text-only message...")
+            logger.error("[@%s] ❌ Screenshot send failed: %s: %s", username, type(e).__name__, e)
+            logger.info("[@%s] Falling back to text-only message...", username)
             
             try:
                 await self.telegram_client.send_message(
@@ -317,9 +432,9 @@ class TelegramMonitorService:
                     buttons=[button],
                     parse_mode="md",
                 )
-                logger.info(f"[@{username}] ✅ Fallback text message sent")
+                logger.info("[@%s] ✅ Fallback text message sent", username)
             except Exception as fallback_error:
-                logger.error(f"[@{username}] ❌ Fallback message failed: {fallback_error}", exc_info=True)
+                logger.error("[@%s] ❌ Fallback message failed: %s: %s", username, type(fallback_error).__name__, fallback_error)
 
 
     # -----------------------------------------------------
@@ -327,19 +442,24 @@ class TelegramMonitorService:
     # -----------------------------------------------------
 
     def start_monitoring(self, username: str, chat_id: int):
-        """Start monitoring a username"""
-        task = asyncio.create_task(self.monitor_account(username, chat_id))
-        self.active_monitors[username] = task
-        logger.info(f"[@{username}] Monitor task created")
-        return task
+        """Start monitoring a username (first check runs as soon as a worker is free)"""
+        entry = {"chat_id": chat_id, "start_time": time.time(), "checks": 0}
+        self.active_monitors[username] = entry
+        self._schedule(username, entry)
+        logger.info(f"[@{username}] 🚀 Started monitoring for chat {chat_id}")
+
+    def start_monitoring_many(self, items: List[Tuple[str, int]]):
+        """Start monitoring several usernames at once"""
+        for username, chat_id in items:
+            self.start_monitoring(username, chat_id)
+        if items:
+            logger.info(f"Started monitoring {len(items)} account(s)")
 
     def stop_monitoring(self, username: str):
         """Stop monitoring a username"""
         self.data_manager.remove_account(username)
-        task = self.active_monitors.pop(username, None)
-        if task:
-            task.cancel()
-            logger.info(f"[@{username}] Monitor task cancelled")
+        if self.active_monitors.pop(username, None):
+            logger.info(f"[@{username}] Monitoring cancelled")
 
     def stop_all_monitoring(self, clear_database: bool = False):
         """Stop all monitoring tasks
@@ -348,12 +468,12 @@ class TelegramMonitorService:
             clear_database: If True, also clear the database (for .removeall command)
                           If False, keep accounts in database (for shutdown/restart)
         """
-        # Cancel all active tasks
-        for username in list(self.active_monitors.keys()):
-            task = self.active_monitors.pop(username, None)
-            if task:
-                task.cancel()
-                logger.info(f"[@{username}] Monitor task cancelled")
+        # Unschedule everything and stop the workers
+        self.active_monitors.clear()
+        self._due_heap.clear()
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
         
         # Only clear database if explicitly requested (e.g., .removeall command)
         if clear_database:
@@ -1,13 +1,47 @@
 """Screenshot generation module"""
 import logging
+from functools import lru_cache
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
-from typing import Optional
+from typing import Dict, Optional
 
 logger = logging.getLogger("ig_monitor_bot")
 
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+# All regular weight, no bold
+FONT_SIZES = {
+    "username": 52,
+    "stats_number": 42,
+    "stats_label": 28,
+    "handle": 32,
+    "button": 32,
+}
+
+# { role: font } shared by every ScreenshotGenerator, filled by _load_fonts()
+_FONTS: Dict[str, ImageFont.ImageFont] = {}
+
+
+def _load_fonts() -> Dict[str, ImageFont.ImageFont]:
+    """Build one FreeTypeFont per distinct size, shared by every generator
+    (font_variant still opens the file once per size; roles of equal size
+    share an object)"""
+    if not _FONTS:
+        try:
+            face = ImageFont.truetype(FONT_PATH, FONT_SIZES["username"])
+            by_size = {}
+            for role, size in FONT_SIZES.items():
+                if size not in by_size:
+                    by_size[size] = face if size == face.size else face.font_variant(size=size)
+                _FONTS[role] = by_size[size]
+        except OSError:
+            logger.warning(f"Could not load font {FONT_PATH}, using default")
+            default = ImageFont.load_default()
+            _FONTS.update(dict.fromkeys(FONT_SIZES, default))
+    return _FONTS
+
+
 class ScreenshotGenerator:
-    def __init__(self):
+    def __init__(self, verification_badge: Optional[bytes] = None):
         # Canvas dimensions - optimized for Instagram
         self.width = 1264
         self.height = 415
@@ -18,22 +52,61 @@ class ScreenshotGenerator:
         self.profile_pic_x = 40
         self.profile_pic_y = 62
         
-        # Load fonts - all regular weight, no bold
+        # Fonts are shared module-wide
+        fonts = _load_fonts()
+        self.font_username = fonts["username"]
+        self.font_stats_number = fonts["stats_number"]
+        self.font_stats_label = fonts["stats_label"]
+        self.font_handle = fonts["handle"]
+        self.font_button = fonts["button"]
+        
+        # Stats layout
+        self.stats_y = 160
+        self.stats_x = 370
+        self.stats_spacing = 290
+        
+        # Everything that doesn't depend on the profile is drawn once here
+        # and copied per screenshot
+        self._base_canvas = self._build_base_canvas()
+        
+        # Circular mask for the profile picture
+        self._circle_mask = Image.new('L', (self.profile_pic_size, self.profile_pic_size), 0)
+        ImageDraw.Draw(self._circle_mask).ellipse(
+            (0, 0, self.profile_pic_size, self.profile_pic_size),
+            fill=255
+        )
+        
+        # "Follow" button label size
+        bbox = ImageDraw.Draw(self._base_canvas).textbbox((0, 0), "Follow", font=self.font_button)
+        self._follow_text_size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+        
+        # Verification badge, decoded and resized once
+        self.badge_size = 65
+        self._badge: Optional[Image.Image] = None
+        if verification_badge:
+            self.set_verification_badge(verification_badge)
+    
+    def set_verification_badge(self, badge_bytes: bytes):
+        """Decode the badge PNG and keep it at its on-screen size"""
         try:
-            self.font_username = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 52)
-            self.font_stats_number = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 42)
-            self.font_stats_label = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 28)
-            self.font_handle = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 32)
-            self.font_button = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 32)
-        except:
-            logger.warning("Could not load custom fonts, using default")
-            self.font_username = ImageFont.load_default()
-            self.font_stats_number = ImageFont.load_default()
-            self.font_stats_label = ImageFont.load_default()
-            self.font_handle = ImageFont.load_default()
-            self.font_button = ImageFont.load_default()
+            badge_img = Image.open(BytesIO(badge_bytes)).convert('RGBA')
+            self._badge = badge_img.resize((self.badge_size, self.badge_size), Image.LANCZOS)
+        except Exception as e:
+            self._badge = None
+            logger.error(f"Error loading verification badge: {e}")
+    
+    def _build_base_canvas(self) -> Image:
+        """Background plus the fixed stats labels"""
+        img = Image.new('RGB', (self.width, self.height), color=self.background_color)
+        draw = ImageDraw.Draw(img)
+        label_y = self.stats_y + 52
+        for i, label in enumerate(("posts", "followers", "following")):
+            x = self.stats_x + i * self.stats_spacing
+            draw.text((x, label_y), label, fill='#A8A8A8', font=self.font_stats_label)
+        return img
     
     @staticmethod
+    @lru_cache(maxsize=256)
     def format_count(count: int) -> str:
         """Format follower/following count"""
         if count >= 1_000_000:
@@ -42,28 +115,17 @@ class ScreenshotGenerator:
             return f"{count/1_000:.1f}K"
         return str(count)
     
-    def _add_profile_picture(self, img: Image, draw: ImageDraw, image_data: Optional[bytes]):
+    def _add_profile_picture(self, img: Image, draw: ImageDraw, image_data: Optional[BytesIO]):
         """Add profile picture to screenshot"""
-        if image_data:
+        if image_data is not None:
             try:
-                profile_pic = Image.open(BytesIO(image_data)).resize(
+                profile_pic = Image.open(image_data).convert('RGB').resize(
                     (self.profile_pic_size, self.profile_pic_size),
                     Image.LANCZOS
                 )
                 
-                # Create circular mask
-                mask = Image.new('L', (self.profile_pic_size, self.profile_pic_size), 0)
-                ImageDraw.Draw(mask).ellipse(
-                    (0, 0, self.profile_pic_size, self.profile_pic_size), 
-                    fill=255
-                )
-                
-                # Apply mask
-                output = Image.new('RGBA', (self.profile_pic_size, self.profile_pic_size), (0, 0, 0, 0))
-                output.paste(profile_pic, (0, 0))
-                output.putalpha(mask)
-                
-                img.paste(output, (self.profile_pic_x, self.profile_pic_y), output)
+                # Paste through the circular mask
+                img.paste(profile_pic, (self.profile_pic_x, self.profile_pic_y), self._circle_mask)
             except Exception as e:
                 logger.error(f"Error processing profile picture: {e}")
                 self._draw_placeholder_picture(draw)
@@ -81,7 +143,7 @@ class ScreenshotGenerator:
             width=3
         )
     
-    def _add_header(self, draw: ImageDraw, username: str, is_verified: bool, verification_badge: Optional[bytes]):
+    def _add_header(self, draw: ImageDraw, username: str, is_verified: bool):
         """Add username, verification badge, follow button and three-dot menu"""
         header_x = 370
         username_y = 75
@@ -96,21 +158,14 @@ class ScreenshotGenerator:
         current_x = header_x + username_width + 20
         
         # Add verification badge if verified
-        if is_verified and verification_badge:
-            try:
-                badge_size = 65
-                badge_img = Image.open(BytesIO(verification_badge)).convert('RGBA')
-                badge_img = badge_img.resize((badge_size, badge_size), Image.LANCZOS)
-                
-                badge_x = current_x
-                badge_y = username_y
-                
-                img = draw._image
-                img.paste(badge_img, (badge_x, badge_y), badge_img)
-                
-                current_x += badge_size + 20
-            except Exception as e:
-                logger.error(f"Error adding verification badge: {e}")
+        if is_verified and self._badge is not None:
+            badge_x = current_x
+            badge_y = username_y
+            
+            img = draw._image
+            img.paste(self._badge, (badge_x, badge_y), self._badge)
+            
+            current_x += self.badge_size + 20
         
         # Follow button
         button_width = 180
@@ -126,9 +181,7 @@ class ScreenshotGenerator:
         )
         
         follow_text = "Follow"
-        bbox = draw.textbbox((0, 0), follow_text, font=self.font_button)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+        text_width, text_height = self._follow_text_size
         text_x = button_x + (button_width - text_width) // 2
         text_y = button_y + (button_height - text_height) // 2 - 2
         draw.text((text_x, text_y), follow_text, fill='#FFFFFF', font=self.font_button)
@@ -148,25 +201,20 @@ class ScreenshotGenerator:
             )
     
     def _add_stats(self, draw: ImageDraw, followers: int, following: int, posts: int):
-        """Add stats section"""
-        stats_y = 160
-        header_x = 370
-        spacing = 290
+        """Add stats numbers (labels are part of the base canvas)"""
+        stats_y = self.stats_y
         
         # Posts
-        posts_x = header_x
+        posts_x = self.stats_x
         draw.text((posts_x, stats_y), str(posts), fill='#FFFFFF', font=self.font_stats_number)
-        draw.text((posts_x, stats_y + 52), "posts", fill='#A8A8A8', font=self.font_stats_label)
         
         # Followers
-        followers_x = posts_x + spacing
+        followers_x = posts_x + self.stats_spacing
         draw.text((followers_x, stats_y), self.format_count(followers), fill='#FFFFFF', font=self.font_stats_number)
-        draw.text((followers_x, stats_y + 52), "followers", fill='#A8A8A8', font=self.font_stats_label)
         
         # Following
-        following_x = followers_x + spacing
+        following_x = followers_x + self.stats_spacing
         draw.text((following_x, stats_y), str(following), fill='#FFFFFF', font=self.font_stats_number)
-        draw.text((following_x, stats_y + 52), "following", fill='#A8A8A8', font=self.font_stats_label)
     
     def _add_username_handle(self, draw: ImageDraw, username: str):
         """Add username handle at bottom"""
@@ -177,31 +225,29 @@ class ScreenshotGenerator:
     def create_screenshot(
         self, 
         username: str, 
-        image_data: Optional[bytes],
+        image_data: Optional[BytesIO],
         followers: int,
         following: int,
         posts: int,
         full_name: str,
         bio: str,
-        is_verified: bool = False,
-        verification_badge: Optional[bytes] = None
+        is_verified: bool = False
     ) -> Optional[BytesIO]:
         """Create Instagram profile screenshot
         
         Args:
             username: Instagram username
-            image_data: Profile picture image bytes
+            image_data: Profile picture image (file-like, as downloaded)
             followers: Number of followers
             following: Number of following
             posts: Number of posts
             full_name: Full display name (not used)
             bio: Bio text (not used)
-            is_verified: Whether the account is verified
-            verification_badge: Verification badge image bytes
+            is_verified: Whether the account is verified (badge is drawn if one is loaded)
         """
         try:
-            # Create base image
-            img = Image.new('RGB', (self.width, self.height), color=self.background_color)
+            # Start from the prerendered background
+            img = self._base_canvas.copy()
             draw = ImageDraw.Draw(img)
             
             # Store img reference for badge pasting
@@ -209,13 +255,14 @@ class ScreenshotGenerator:
             
             # Add all elements
             self._add_profile_picture(img, draw, image_data)
-            self._add_header(draw, username, is_verified, verification_badge)
+            self._add_header(draw, username, is_verified)
             self._add_stats(draw, followers, following, posts)
             self._add_username_handle(draw, username)
             
             # Save to buffer
             output_buffer = BytesIO()
-            img.save(output_buffer, format='PNG', optimize=True, quality=100)
+            # Fast zlib level: the image is sent once, flat UI art barely shrinks further
+            img.save(output_buffer, format='PNG', compress_level=1)
             output_buffer.seek(0)
             
             return output_buffer
@@ -1,18 +1,30 @@
 """Instagram session manager module"""
 import json
 import logging
+import random
+import time
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Sequence
+
+from modules.json_io import atomic_write_json, read_json
 
 logger = logging.getLogger("ig_monitor_bot")
 
+# Seconds a session sits out after it was rotated away from (429 / auth error)
+COOLDOWN_RANGE = (60, 300)
+
 
 class SessionManager:
     """Manages Instagram session IDs"""
     def __init__(self, session_file: Path):
         self.session_file = session_file
+        # current_index survives restarts in a sidecar file next to session.json
+        self.state_file = session_file.with_suffix('.state')
+        self._mtime = None
         self.sessions = self._load_sessions()
-        self.current_index = 0
+        self.current_index = self._load_index()
+        self._cooldowns: Dict[int, float] = {}   # { index: monotonic time it may be used again }
+        self._session_ua: Dict[int, str] = {}    # { index: user agent bound to that session }
     
     def _load_sessions(self) -> List[str]:
         """Load session IDs from file"""
@@ -28,20 +40,72 @@ class SessionManager:
                 json.dump(default_sessions, f, indent=2)
             logger.warning(f"Created session.json at {self.session_file}")
             logger.warning("Please add valid Instagram session IDs!")
-        
-        with open(self.session_file, 'r') as f:
-            data = json.load(f)
-            sessions = data.get('sessions', [])
-            logger.info(f"Loaded {len(sessions)} Instagram session(s)")
-            return sessions
+
+        self._mtime = self.session_file.stat().st_mtime_ns
+        data = read_json(self.session_file)
+        sessions = data.get('sessions', [])
+        logger.info(f"Loaded {len(sessions)} Instagram session(s)")
+        return sessions
+    
+    def _load_index(self) -> int:
+        """Last used session index, if it still fits the session list"""
+        try:
+            index = int(read_json(self.state_file).get('current_index', 0))
+        except Exception:
+            return 0
+        return index if 0 <= index < len(self.sessions) else 0
+    
+    def _save_index(self):
+        try:
+            atomic_write_json(self.state_file, {"current_index": self.current_index})
+        except Exception as e:
+            logger.error(f"Error saving session state: {e}")
+    
+    def _reload_if_changed(self):
+        """Pick up edits to session.json (e.g. from the management bot)"""
+        try:
+            mtime = self.session_file.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        sessions = self._load_sessions()
+        if sessions != self.sessions:
+            self.sessions = sessions
+            self.current_index = 0
+            self._cooldowns.clear()
+            self._session_ua.clear()
+            self._save_index()
     
     def get_current_session(self) -> str:
         """Get current session ID"""
+        self._reload_if_changed()
         if not self.sessions:
             raise ValueError("No Instagram sessions available!")
         return self.sessions[self.current_index]
     
+    def get_ua_for_current(self, user_agents: Sequence[str]) -> str:
+        """User agent for the current session, picked once and kept stable so a
+        sessionid never shows up with a different client"""
+        ua = self._session_ua.get(self.current_index)
+        if ua is None:
+            ua = self._session_ua[self.current_index] = random.choice(user_agents)
+        return ua
+    
     def rotate_session(self):
-        """Rotate to next session"""
-        self.current_index = (self.current_index + 1) % len(self.sessions)
-        logger.info(f"Rotated to Instagram session {self.current_index + 1}/{len(self.sessions)}")
\ No newline at end of file
+        """Rotate to the next session that isn't cooling down"""
+        count = len(self.sessions)
+        if not count:
+            return
+        now = time.monotonic()
+        self._cooldowns[self.current_index] = now + random.uniform(*COOLDOWN_RANGE)
+        for step in range(1, count + 1):
+            index = (self.current_index + step) % count
+            if self._cooldowns.get(index, 0) <= now:
+                break
+        else:
+            # Every session is cooling down: take the one that frees up first
+            index = min(range(count), key=lambda i: self._cooldowns.get(i, 0))
+        self.current_index = index
+        self._save_index()
+        logger.info(f"Rotated to Instagram session {self.current_index + 1}/{len(self.sessions)}")
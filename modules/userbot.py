@@ -0,0 +1,493 @@
+"""
+Telegram Instagram Monitor userbot
+Shared by every client; clients/<name>/main.py only supplies its paths
+"""
+
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import os
+import re
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from telethon import TelegramClient, events
+from telethon.sessions import StringSession
+
+from modules.config_manager import Config
+from modules.data_manager import DataManager
+from modules.session_manager import SessionManager
+from modules.instagram_api import InstagramAPI
+from modules.screenshot_gen import ScreenshotGenerator
+from modules.monitor_service import TelegramMonitorService
+
+logger = logging.getLogger("ig_monitor_bot")
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Seconds buffered log records may wait before reaching the log file
+LOG_FLUSH_INTERVAL = 2.0
+
+# @mention (group 1) or profile URL (group 2), matched in a single scan
+_USERNAME_RE = re.compile(r'@([a-zA-Z0-9._]+)|(?:instagram|ig)\.com/([a-zA-Z0-9._]+)', re.IGNORECASE)
+_CMD_RE      = re.compile(r'^\.(add|list|remove|removeall|help)(?:\s+(.+))?$')
+# Instagram's rules: at most 30 chars, no leading or trailing dot
+_VALID_IG    = re.compile(r'^(?!\.)[A-Za-z0-9._]{1,30}(?<!\.)$')
+
+# Commands that take arguments; the others must be sent bare
+_ARG_COMMANDS = frozenset({"add", "remove"})
+
+ADDED_AT_FORMAT = '%Y-%m-%d %H:%M'
+
+
+@lru_cache(maxsize=512)
+def _format_iso_added_at(iso: str) -> str:
+    """Format a legacy ISO added_at timestamp (never changes once written)"""
+    return datetime.fromisoformat(iso).strftime(ADDED_AT_FORMAT)
+
+
+def _format_added_at(data: Dict) -> str:
+    """Format when an account was added, preferring the epoch timestamp"""
+    ts = data.get('added_at_ts')
+    if ts is not None:
+        return time.strftime(ADDED_AT_FORMAT, time.localtime(ts))
+    return _format_iso_added_at(data['added_at'])
+
+
+def setup_logging(log_file: Path):
+    """Log to console and to a buffered client log file"""
+    # Buffer file writes: records are flushed in batches of 64, every
+    # LOG_FLUSH_INTERVAL seconds (see flush_logs_periodically), or immediately
+    # on ERROR and above so failures are never stuck in memory
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))  # basicConfig only formats the buffer
+    log_buffer = logging.handlers.MemoryHandler(
+        capacity=64,
+        flushLevel=logging.ERROR,
+        target=file_handler
+    )
+    atexit.register(log_buffer.flush)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        handlers=[
+            log_buffer,
+            logging.StreamHandler()
+        ]
+    )
+
+    # Suppress Telethon debug noise
+    logging.getLogger('telethon').setLevel(logging.WARNING)
+
+
+def flush_log_handlers():
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+
+async def flush_logs_periodically(interval: float = LOG_FLUSH_INTERVAL):
+    """Keep the log file (tailed by the management bot) no more than
+    `interval` seconds behind"""
+    while True:
+        await asyncio.sleep(interval)
+        flush_log_handlers()
+
+
+def read_credentials(env_file: Path) -> Tuple[int, str, Optional[str]]:
+    """Read Telegram credentials from the environment (loaded from env_file)"""
+    api_id         = os.getenv("API_ID")
+    api_hash       = os.getenv("API_HASH")
+    string_session = os.getenv("STRING_SESSION")
+
+    if not api_id or not api_hash:
+        print(f"❌ API_ID or API_HASH missing! Expected .env at: {env_file}")
+        sys.exit(1)
+
+    try:
+        api_id = int(api_id)
+    except ValueError:
+        print(f"❌ API_ID must be a number! Check {env_file}")
+        sys.exit(1)
+
+    return api_id, api_hash, string_session
+
+
+class InstagramMonitorBot:
+    """Main Telegram userbot"""
+
+    def __init__(
+        self,
+        client_dir: Path,
+        project_root: Path,
+        api_id: int,
+        api_hash: str,
+        string_session: Optional[str] = None,
+        name: str = "client1",
+    ):
+        logger.info("="*50)
+        logger.info("Initializing Instagram Monitor Bot - %s", name)
+        logger.info("="*50)
+
+        config_file    = client_dir / "config.json"
+        monitored_file = client_dir / "monitored.json"
+        session_file   = client_dir / "session.json"
+        bluetick_path  = project_root / "bluetick.png"
+
+        # The file-backed managers don't depend on each other: read them in
+        # parallel and only wait where a result is needed
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            config_future     = pool.submit(Config, config_file)
+            session_future    = pool.submit(SessionManager, session_file)
+            data_future       = pool.submit(DataManager, monitored_file)
+            screenshot_future = pool.submit(ScreenshotGenerator)
+
+            # Load config (intervals, screenshot toggle, proxy)
+            self.config = config_future.result()
+            logger.info("✅ Configuration loaded")
+
+            self.session_manager = session_future.result()
+            self.data_manager    = data_future.result()
+            self.screenshot_gen  = screenshot_future.result()
+
+        # Initialize Telegram client from .env credentials
+        if string_session and string_session != "YOUR_STRING_SESSION":
+            self.client = TelegramClient(
+                StringSession(string_session),
+                api_id,
+                api_hash
+            )
+            logger.info("✅ Using string session from .env")
+        else:
+            self.client = TelegramClient(
+                str(client_dir / name),
+                api_id,
+                api_hash
+            )
+            logger.info("✅ Using session file (%s.session)", name)
+
+        # Initialize dependent modules
+        self.instagram_api   = InstagramAPI(
+            self.session_manager, self.config.proxy_url,
+            (self.config.min_request_gap, self.config.max_request_gap)
+        )
+        self.monitor_service = TelegramMonitorService(
+            self.instagram_api,
+            self.data_manager,
+            self.screenshot_gen,
+            self.client,
+            self.config,
+            bluetick_path
+        )
+
+        logger.info("✅ All modules initialized")
+
+        # One queue + worker per chat: commands in a chat run in order,
+        # different chats never wait on each other
+        self._chat_queues: Dict[int, asyncio.Queue] = {}
+        self._chat_workers: Dict[int, asyncio.Task] = {}
+        self._delete_tasks: Set[asyncio.Task] = set()
+
+        self._setup_handlers()
+        logger.info("✅ Command handlers registered")
+
+    def _setup_handlers(self):
+        """Setup command handlers"""
+        self._dispatch = {
+            "add":       self._handle_add,
+            "list":      self._handle_list,
+            "remove":    self._handle_remove,
+            "removeall": self._handle_removeall,
+            "help":      self._handle_help,
+        }
+
+        # One handler for every outgoing message: a single regex picks the
+        # command instead of Telethon trying five patterns per message
+        @self.client.on(events.NewMessage(outgoing=True))
+        async def command_handler(event):
+            m = _CMD_RE.match(event.raw_text or "")
+            if not m:
+                return
+            command, args = m.group(1), m.group(2)
+            if args and command not in _ARG_COMMANDS:
+                return
+            await self._enqueue(event, self._dispatch[command], args)
+
+    async def _enqueue(self, event, handler, args):
+        """Queue a command on its chat's worker"""
+        queue = self._chat_queues.get(event.chat_id)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._chat_queues[event.chat_id] = queue
+            self._chat_workers[event.chat_id] = asyncio.create_task(self._chat_worker(queue))
+        await queue.put((event, handler, args))
+
+    async def _chat_worker(self, queue: asyncio.Queue):
+        """Run queued commands for one chat sequentially"""
+        while True:
+            event, handler, args = await queue.get()
+            try:
+                await handler(event, args)
+            except Exception as e:
+                logger.error("Unhandled error in %s: %s", handler.__name__, e, exc_info=True)
+            finally:
+                queue.task_done()
+
+    def _extract_usernames(self, text: str) -> List[str]:
+        """Extract Instagram usernames from text"""
+        if not text:
+            return []
+        # Every match needs an '@' or a URL path slash; skip the regex otherwise
+        if '@' not in text and '/' not in text:
+            return []
+        # dict keeps first-seen order, so replies list accounts as written
+        usernames = {}
+        for m in _USERNAME_RE.finditer(text):
+            # Instagram usernames are case-insensitive: @User and @user are one account
+            # A mention ending a sentence ("follow @john.") picks up the full stop
+            u = (m.group(1) or m.group(2)).strip().rstrip('.').lower()
+            if _VALID_IG.match(u):
+                usernames[u] = None
+        return list(usernames)
+
+    async def _reply_and_self_destruct(self, event, text: str, ttl: float, parse_mode: str = 'md'):
+        """Edit the command message into a reply and schedule its deletion"""
+        try:
+            await event.edit(text, parse_mode=parse_mode)
+        except Exception:
+            logger.exception("reply failed")
+            return
+        self._schedule_delete(event, ttl)
+
+    def _schedule_delete(self, event, ttl: float):
+        """Delete the message after ttl seconds without keeping the handler suspended"""
+        asyncio.get_running_loop().call_later(ttl, self._start_delete, event)
+
+    def _start_delete(self, event):
+        task = asyncio.create_task(self._delete_message(event))
+        # Hold a reference until done so the task isn't garbage collected
+        self._delete_tasks.add(task)
+        task.add_done_callback(self._delete_tasks.discard)
+
+    async def _delete_message(self, event):
+        try:
+            await event.delete()
+        except Exception:
+            logger.exception("delete failed")
+
+    async def _handle_add(self, event, args: Optional[str]):
+        """Handle .add command"""
+        try:
+            usernames = []
+
+            if event.reply_to_msg_id:
+                reply_msg = await event.get_reply_message()
+                if reply_msg and reply_msg.text:
+                    usernames = self._extract_usernames(reply_msg.text)
+                    logger.info("Extracted %d username(s) from replied message", len(usernames))
+
+            if args:
+                cmd_usernames = self._extract_usernames(args)
+                usernames.extend(cmd_usernames)
+                logger.info("Extracted %d username(s) from command", len(cmd_usernames))
+
+            if not usernames:
+                return await self._reply_and_self_destruct(
+                    event, "❌ No usernames found. Use: `.add @username` or reply to a message", 3
+                )
+
+            chat_id = event.chat_id
+            added = []
+            already_monitoring = []
+
+            for username in dict.fromkeys(usernames):
+                if self.data_manager.is_monitoring(username):
+                    already_monitoring.append(username)
+                else:
+                    added.append(username)
+
+            to_add = [(username, chat_id) for username in added]
+            self.data_manager.add_accounts(to_add)
+            self.monitor_service.start_monitoring_many(to_add)
+
+            sections = []
+            if added:
+                sections.append("✅ **Monitoring started:**\n" + "\n".join(f"└ @{u}" for u in added))
+            if already_monitoring:
+                sections.append("⚠️ **Already monitoring:**\n" + "\n".join(f"└ @{u}" for u in already_monitoring))
+            response = "\n\n".join(sections)
+
+            await self._reply_and_self_destruct(event, response, 5)
+
+        except Exception as e:
+            logger.error("Error in add handler: %s", e, exc_info=True)
+            await self._reply_and_self_destruct(event, "❌ Failed to add accounts", 3)
+
+    async def _handle_list(self, event, args: Optional[str]):
+        """Handle .list command"""
+        try:
+            accounts = self.data_manager.get_all_accounts()
+
+            if not accounts:
+                return await self._reply_and_self_destruct(event, "📋 No accounts being monitored", 3)
+
+            lines = [
+                f"└ @{username} (since {_format_added_at(data)})"
+                for username, data in accounts.items()
+            ]
+            response = f"📋 **Monitoring {len(accounts)} account(s):**\n\n" + "\n".join(lines)
+
+            await self._reply_and_self_destruct(event, response, 8)
+
+        except Exception as e:
+            logger.error("Error in list handler: %s", e, exc_info=True)
+            await self._reply_and_self_destruct(event, "❌ Failed to list accounts", 3)
+
+    async def _handle_remove(self, event, args: Optional[str]):
+        """Handle .remove command"""
+        try:
+            if not args:
+                return await self._reply_and_self_destruct(event, "❌ Usage: `.remove @username`", 3)
+
+            username = args.strip().lstrip('@')
+
+            if self.data_manager.is_monitoring(username):
+                self.monitor_service.stop_monitoring(username)
+                await self._reply_and_self_destruct(event, f"✅ Stopped monitoring **@{username}**", 3)
+            else:
+                await self._reply_and_self_destruct(event, f"❌ Not monitoring **@{username}**", 3)
+
+        except Exception as e:
+            logger.error("Error in remove handler: %s", e, exc_info=True)
+            await self._reply_and_self_destruct(event, "❌ Failed to remove account", 3)
+
+    async def _handle_removeall(self, event, args: Optional[str]):
+        """Handle .removeall command"""
+        try:
+            accounts = self.data_manager.get_all_accounts()
+            count = len(accounts)
+
+            if count == 0:
+                return await self._reply_and_self_destruct(event, "📋 No accounts to remove", 3)
+
+            self.monitor_service.stop_all_monitoring(clear_database=True)
+            await self._reply_and_self_destruct(event, f"✅ Stopped monitoring all **{count}** account(s)", 3)
+
+        except Exception as e:
+            logger.error("Error in removeall handler: %s", e, exc_info=True)
+            await self._reply_and_self_destruct(event, "❌ Failed to stop monitoring", 3)
+
+    async def _handle_help(self, event, args: Optional[str]):
+        """Handle .help command"""
+        help_text = (
+            "**Instagram Monitor Commands**\n\n"
+            "`.add @user1 @user2` - Start monitoring\n"
+            "`.add` (reply to msg) - Extract & monitor\n"
+            "`.list` - Show monitored accounts\n"
+            "`.remove @username` - Stop monitoring\n"
+            "`.removeall` - Stop all monitoring\n"
+            "`.help` - This message\n\n"
+            "**Track banned accounts. Get instant alerts.**"
+        )
+        await self._reply_and_self_destruct(event, help_text, 10)
+
+    async def start(self):
+        """Start the bot"""
+        logger.info("="*50)
+        logger.info("Starting Telegram Client...")
+        logger.info("="*50)
+
+        await self.client.connect()
+
+        if not await self.client.is_user_authorized():
+            logger.error("❌ Telegram session is invalid or expired!")
+            raise SystemExit("Invalid Telegram session")
+
+        me = await self.client.get_me()
+        logger.info("✅ Logged in as: %s (@%s)", me.first_name, me.username)
+
+        # Create the shared HTTP session up front rather than on the first check
+        await self.instagram_api.get_session()
+
+        monitored = len(self.data_manager.get_all_accounts())
+        logger.info("📊 Currently monitoring: %d account(s)", monitored)
+
+        if monitored > 0:
+            logger.info("🔄 Resuming monitoring for existing accounts...")
+            self.monitor_service.resume_all_monitoring()
+
+        logger.info("="*50)
+        logger.info("✅ BOT IS READY!")
+        logger.info("="*50)
+
+        await self.client.run_until_disconnected()
+
+    async def stop(self):
+        """Stop the bot"""
+        logger.info("Stopping bot...")
+        for worker in self._chat_workers.values():
+            worker.cancel()
+        self.monitor_service.stop_all_monitoring(clear_database=False)
+        await self.instagram_api.close()
+        await self.client.disconnect()
+        self.data_manager.flush()
+        logger.info("✅ Bot stopped gracefully")
+        flush_log_handlers()
+
+
+async def main(client_dir: Path, project_root: Path, name: str):
+    api_id, api_hash, string_session = read_credentials(client_dir / ".env")
+    bot = InstagramMonitorBot(client_dir, project_root, api_id, api_hash, string_session, name)
+    log_flusher = asyncio.create_task(flush_logs_periodically())
+
+    # systemctl stop/restart sends SIGTERM: cancel main so stop() still runs
+    # and the buffered log lines and pending data reach disk
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass  # No signal handlers on Windows event loops
+
+    try:
+        await bot.start()
+    except KeyboardInterrupt:
+        logger.info("⚠️ Interrupted")
+    except asyncio.CancelledError:
+        logger.info("⚠️ Terminated")
+    except Exception as e:
+        logger.error("❌ Fatal error: %s", e, exc_info=True)
+    finally:
+        await bot.stop()
+        log_flusher.cancel()
+
+
+def run(client_dir: Path, project_root: Path, name: str = "client1"):
+    """Run the userbot for one client directory (blocks until exit)"""
+    setup_logging(client_dir / f"{name}.log")
+
+    # uvloop is an optional, faster drop-in event loop (Linux/macOS).
+    # uvloop.install() is deprecated on Python 3.12+, so the loop is passed in
+    # explicitly instead of via a global policy
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+
+    coro = main(client_dir, project_root, name)
+    try:
+        if uvloop is not None and hasattr(uvloop, "run"):
+            uvloop.run(coro)
+        elif uvloop is not None and hasattr(asyncio, "Runner"):
+            # uvloop < 0.18 has no run()
+            with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+                runner.run(coro)
+        else:
+            asyncio.run(coro)
+    except KeyboardInterrupt:
+        print("\nExiting...")
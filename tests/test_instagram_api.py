@@ -0,0 +1,45 @@
+"""Tests for modules.instagram_api"""
+import asyncio
+import unittest
+
+try:
+    import aiohttp  # noqa: F401
+except ImportError:
+    aiohttp = None
+
+if aiohttp is not None:
+    from modules.instagram_api import InstagramAPI
+
+
+class _FakeContent:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def iter_chunked(self, size):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class _FakeResponse:
+    def __init__(self, *chunks: bytes):
+        self.content = _FakeContent(chunks)
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class ReadIntoBufferTest(unittest.TestCase):
+    def read(self, *chunks: bytes):
+        return asyncio.run(InstagramAPI._read_into_buffer(_FakeResponse(*chunks)))
+
+    def test_empty_body_is_none(self):
+        # An empty 200 must take the text-only / placeholder path
+        self.assertIsNone(self.read())
+        self.assertIsNone(self.read(b""))
+
+    def test_body_is_rewound(self):
+        buf = self.read(b"\x89PNG", b"rest")
+        self.assertEqual(buf.tell(), 0)
+        self.assertEqual(buf.read(), b"\x89PNGrest")
+
+
+if __name__ == "__main__":
+    unittest.main()